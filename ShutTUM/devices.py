@@ -30,7 +30,10 @@ class StereoCamera(object):
         """
         self._sequence = sequence
         self._shutter = shutter
-        self._data = self._sequence.raw.frames
+
+    @property
+    def _data(self):
+        return self._sequence.raw.frames
 
     def __iter__(self):
         self._id = int(self._data[0,1])   # take the first ID (column 1) in the first row (0th)
@@ -7,6 +7,19 @@ from collections import namedtuple
 import ShutTUM.devices
 import ShutTUM.values
 
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # python2 without the futures backport
+    ThreadPoolExecutor = None
+
+# Prefer the libyaml backed loader, both parameter files contain only plain yaml
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 class Sequence(object):
     r"""The base class representing one dataset sequence.
@@ -35,6 +48,12 @@ class Sequence(object):
     """
 
     _Data = namedtuple('Data', 'global_ rolling imu groundtruth stamp')
+    _Raw  = namedtuple('Raw', ['frames', 'imu', 'groundtruth'])
+    _Resolution = namedtuple('Resolution', 'width height')
+    _Limits     = namedtuple('Limits', ['min', 'max'])
+
+    # Parsed gamma lookup tables shared by all sequences, keyed by the real path of their gamma.txt
+    _gamma_cache = {}
 
     @staticmethod
     def _check_folder_exists(folder):
@@ -67,6 +86,33 @@ class Sequence(object):
         if key not in dictionary:
             raise ValueError("Could not find %s in %s, record folder seems not to be valid!" % (key, file))
 
+    @staticmethod
+    def _load_csv(file):
+        r""" Loads a tab separated data file (with one header line) into a float matrix
+        :param str file: the path to the csv file to load
+        :return: an ndarray with one row per line, non numeric entries (e.g. ``N/A``) become ``nan``
+
+        Uses the C parser of pandas if available, otherwise falls back to numpy's genfromtxt
+        """
+        if pd is not None:
+            return pd.read_csv(file, sep='\t', skiprows=1, header=None, dtype=np.float64,
+                               na_values=['nan']).to_numpy()
+        return np.genfromtxt(file, delimiter='\t', skip_header=1)
+
+    @staticmethod
+    def _load_gamma(file):
+        r""" Loads a gamma lookup table, which is parsed only once and then shared (read-only) between all sequences
+        :param str file: the path to the ``gamma.txt``
+        :return: the lookup table as ndarray
+        """
+        key = p.realpath(file)
+        lut = Sequence._gamma_cache.get(key)
+        if lut is None:
+            lut = np.loadtxt(file)
+            lut.setflags(write=False)
+            Sequence._gamma_cache[key] = lut
+        return lut
+
     def __init__(self, path, stereosync=True, calibration=False):
         r""" 
         :param str path: the path to one sequence of the dataset, such as ``~/ShutTUM/0001``
@@ -78,7 +124,7 @@ class Sequence(object):
         
         1. It is checked that in path there exists a ``data``, ``frames`` and ``params`` folder
         2. It is checked that there exists the files ``data/frames.csv``, ``data/imu.csv`` and ``data/ground_truth.csv``
-        3. The files from 2. are loaded into memory (see :any:`raw`)
+        3. The files from 2. are loaded into memory on first access (see :any:`raw`)
         4. The ``params/time.yaml`` is loaded
         5. The ``params/params.yaml`` is loaded
            
@@ -102,18 +148,15 @@ class Sequence(object):
         Sequence._check_file_exists(i)
         Sequence._check_file_exists(g)
 
-        self._frames       = np.genfromtxt(f, delimiter='\t', skip_header=1)#, dtype=(float, int, float, str))
-        self._imu          = np.genfromtxt(i, delimiter='\t', skip_header=1)
-        self._ground_truth = np.genfromtxt(g, delimiter='\t', skip_header=1)
-        self._times = list(sorted(set(self._frames[:,0]) | set(self._imu[:,0]) | set(self._ground_truth[:,0])))
+        # The csv files are only parsed, when the data is actually needed
+        self._data_files  = (f, i, g)
+        self._data_loaded = False
 
-        Raw = namedtuple('Raw', ['frames', 'imu', 'groundtruth'])
-        self._raw = Raw(self._frames, self._imu, self._ground_truth)
         self._time = {}
         timefile = p.join(path, 'params', 'time.yaml')
         Sequence._check_file_exists(timefile)
         with open(timefile) as stream:
-            self._time = yaml.load(stream)['time']
+            self._time = yaml.load(stream, Loader=_YamlLoader)['time']
             Sequence._check_contains_key(timefile, self._time, 'start')
             Sequence._check_contains_key(timefile, self._time, 'end')
             Sequence._check_contains_key(timefile, self._time, 'duration')
@@ -122,7 +165,7 @@ class Sequence(object):
         paramfile = p.join(path, 'params', 'params.yaml')
         Sequence._check_file_exists(paramfile)
         with open(paramfile) as stream:
-            self._refs = yaml.load(stream)
+            self._refs = yaml.load(stream, Loader=_YamlLoader)
             if calibration:
                 self._refs['cam1']['shutter']['type'] = 'global'
                 self._refs['cam2']['shutter']['type'] = 'global'
@@ -131,32 +174,70 @@ class Sequence(object):
                 # TODO add doc string for this
 
         self._gammas = {}
+        self._vignettes = {}
         self._cams = {}
-        for ref in self._refs:
+        for ref, config in self._refs.items():
             if ref == 'world': continue  # world param must only be present, not more
 
             # Every other reference must have at least a transform parameter
-            Sequence._check_contains_key(paramfile, self._refs[ref], 'transform')
+            Sequence._check_contains_key(paramfile, config, 'transform')
 
-            if 'shutter' not in self._refs[ref]: continue
+            if 'shutter' not in config: continue
 
             # If the reference contains a 'shutter' param, it is a camera
-            cam = ref
-            self._cams[cam] = self._refs[ref]
+            self._cams[ref] = config
+
+            # gamma.txt & vignette.png are only checked & loaded, when they are looked up the first time
+            self._gammas[ref] = None
+
+        # The camera params do not change anymore, so derive their common values only once.
+        # Missing params are only reported by the corresponding properties, not here
+        self._exposure_limits = None
+        self._rolling_shutter_speed = None
+        if self._cams:
+            # take the first camera, since all limits are the same
+            exp = next(iter(self._cams.values())).get('exposure')
+            if exp is not None:
+                self._exposure_limits = Sequence._Limits(min=exp['min'], max=exp['max'])
+        for config in self._cams.values():
+            shutter = config['shutter']
+            if shutter['type'] == 'rolling':
+                self._rolling_shutter_speed = shutter.get('speed')
+                break
 
-            folder   = p.join(path,   'params', cam)
-            gamma    = p.join(folder, 'gamma.txt')
-            vignette = p.join(folder, 'vignette.png')
-            Sequence._check_folder_exists(folder)
-            Sequence._check_file_exists(gamma)
-            Sequence._check_file_exists(vignette)
-            self._gammas[cam] = np.genfromtxt(gamma, delimiter=' ')
+        # Shortcuts for the lookups done on every stamp in __getitem__
+        self._stereo_extrapolate = ShutTUM.values.StereoImage.extrapolate
+        self._imu_extrapolate    = ShutTUM.values.Imu.extrapolate
+        self._gt_extrapolate     = ShutTUM.values.GroundTruth.extrapolate
 
         self._cameras = ShutTUM.devices.DuoStereoCamera(self)
 
     def __str__(self):
         return "%s (%s)" % (type(self).__name__, p.basename(p.normpath(self._path)))
 
+    def _ensure_data_loaded(self):
+        r""" Loads ``data/frames.csv``, ``data/imu.csv`` and ``data/ground_truth.csv`` on the first call """
+        if self._data_loaded: return
+        if ThreadPoolExecutor is not None:
+            # The parsers release the GIL, so the three files can be read concurrently
+            with ThreadPoolExecutor(max_workers=len(self._data_files)) as executor:
+                data = list(executor.map(Sequence._load_csv, self._data_files))
+        else:
+            data = [Sequence._load_csv(file) for file in self._data_files]
+        self._frames, self._imu, self._ground_truth = data
+
+        # Contiguous copies of the time stamp columns, since most lookups only search those
+        self._frames_t       = np.ascontiguousarray(self._frames[:,0])
+        self._imu_t          = np.ascontiguousarray(self._imu[:,0])
+        self._ground_truth_t = np.ascontiguousarray(self._ground_truth[:,0])
+        ShutTUM.values._nearest_index(self._frames_t, 0.)  # pay a possible jit compilation here, not on lookup
+        self._times = np.unique(np.concatenate((self._frames_t, self._imu_t, self._ground_truth_t)))
+        self._times.setflags(write=False)
+        self._times_list = None
+
+        self._raw = Sequence._Raw(self._frames, self._imu, self._ground_truth)
+        self._data_loaded = True
+
     @property
     def path(self):
         r"""The path to this sequence. Environment variables get expanded automatically"""
@@ -172,6 +253,7 @@ class Sequence(object):
         * ``groundtruth`` (`ndarray <https://docs.scipy.org/doc/numpy-1.13.0/reference/generated/numpy.ndarray.html>`_) corresponding to ``data/ground_truth.csv``
         
         """
+        self._ensure_data_loaded()
         return self._raw
 
     @property
@@ -308,19 +390,33 @@ class Sequence(object):
     @property
     def times(self):
         r"""
-        A list of all time stamps in this sequence.
+        A (read-only) `ndarray <https://docs.scipy.org/doc/numpy-1.13.0/reference/generated/numpy.ndarray.html>`_ of 
+        all time stamps in this sequence.
         
         .. math:: \mathbf{t} = \mathbf{t}_{frames} \cup \mathbf{t}_{imu} \cup \mathbf{t}_{groundtruth}
         
-        Note that this list is sorted, so you can easily iterate over it like so::
+        Note that this array is sorted, so you can easily iterate over it like so::
         
             for time in sequence.times:
                 print(time)
         
+        .. seealso:: :any:`times_list <ShutTUM.Sequence.times_list>` if you need a list of python floats
         
         """
+        self._ensure_data_loaded()
         return self._times
 
+    @property
+    def times_list(self):
+        r"""
+        The same time stamps as :any:`times <ShutTUM.Sequence.times>`, but as a sorted list of python floats, which is 
+        created only once on the first access.
+        """
+        self._ensure_data_loaded()
+        if self._times_list is None:
+            self._times_list = self._times.tolist()
+        return self._times_list
+
     @property
     def start(self):
         r"""
@@ -347,8 +443,7 @@ class Sequence(object):
     @property
     def resolution(self):
         r""" Returns the resolution of the cameras as a named tuple ``Resolution (width, height)`` """
-        Resolution = namedtuple('Resolution', 'width height')
-        return Resolution(width=1280, height=1024)
+        return Sequence._Resolution(width=1280, height=1024)
 
     @property
     def exposure_limits(self):
@@ -364,36 +459,84 @@ class Sequence(object):
             
         
         """
-        Limits = namedtuple('Limits', ['min', 'max'])
-        for cam in self._cams:
-            # take the first camera, since all limits are the same
-            exp = self._cams[cam]['exposure']
-            return Limits(min=exp['min'], max=exp['max'])
+        if self._cams and self._exposure_limits is None:
+            raise ValueError('No exposure limits given for the cams in %s!' % self._path)
+        return self._exposure_limits
 
     def gamma(self, cam, input):
         r""" 
         :param str cam: the name of the camera (e.g. ``"cam1"``)
-        :param float input: the position to lookup, i.e. X-axis on luminance plot. Between 0 .. 255, will be rounded to int
-        :raises: ValueError: for unknown camera names or inputs below 0 or above 255
+        :param float/ndarray input: the position to lookup, i.e. X-axis on luminance plot. Between 0 .. 255, will be 
+                                    rounded to int
+        :raises: ValueError: for unknown camera names, NaN inputs or scalar inputs below 0 or above 255
+        :raises: IOError: if the ``gamma.txt`` of the camera does not exist
         
         Lookup a gamma value from ``params/<cam>/gamma.txt``
+        
+        When ``input`` is an array (e.g. a whole image) all values are looked up at once and an array of the same shape 
+        is returned. Values outside of 0 .. 255 are clipped in this case. Prefer this over calling the function for 
+        every single pixel, since it is a lot faster::
+        
+            img = stereo.L.load()
+            linear = sequence.gamma(stereo.L.reference, img)
+        
         """
         if cam not in self._cams:
             raise ValueError("Unknown camera name: %s" % cam)
-        if input < 0 or input > 255:
-            raise ValueError("Gamma function only defined for inputs from 0 .. 255 and not for %s" % input)
-        return self._gammas[cam][int(round(input))]
+        lut = self._gamma_lut(cam)
+        arr = np.asarray(input)
+        if arr.ndim == 0:
+            if arr < 0 or arr > 255:
+                raise ValueError("Gamma function only defined for inputs from 0 .. 255 and not for %s" % input)
+            return lut[int(round(float(arr)))]
+        if np.isnan(arr).any():
+            raise ValueError("Gamma function is not defined for NaN inputs")
+        idx = np.clip(np.rint(arr), 0, 255).astype(np.intp)
+        return lut[idx]
+
+    def gamma_unchecked(self, cam, input):
+        r"""
+        :param str cam: the name of a camera (e.g. ``"cam1"``), which is *not* validated
+        :param float input: the position to lookup between 0 .. 255, which is *not* validated, will be rounded to int
+        
+        The same lookup as :any:`gamma <ShutTUM.Sequence.gamma>` for a single value, but without any checks. Use this 
+        only in tight loops with inputs known to be valid: an unknown camera raises a KeyError, while inputs out of 
+        0 .. 255 either raise an IndexError or silently return a wrong value (negative inputs index from the end).
+        For whole images prefer the batched lookup of :any:`gamma <ShutTUM.Sequence.gamma>` instead.
+        """
+        return self._gamma_lut(cam)[int(round(input))]
+
+    def _gamma_lut(self, cam):
+        r""" Returns the gamma lookup table of a camera and loads it on first access """
+        lut = self._gammas[cam]
+        if lut is None:
+            file = p.join(self._path, 'params', cam, 'gamma.txt')
+            Sequence._check_file_exists(file)
+            lut = self._gammas[cam] = Sequence._load_gamma(file)
+        return lut
 
     def vignette(self, cam):
         r"""
         :param str cam: the name of the camera to lookup its vignette (e.g. ``"cam1"``)  
         :return: the vignette image, read by `cv2.imread() <http://docs.opencv.org/3.0-beta/doc/py_tutorials/py_gui/py_image_display/py_image_display.html>`_ with dimensions [1280x1024] as grayscale
         :rtype: `ndarray <https://docs.scipy.org/doc/numpy-1.13.0/reference/generated/numpy.ndarray.html>`_
+        :raises: ValueError: for unknown camera names
+        :raises: IOError: if the ``vignette.png`` of the camera does not exist
+
+        The image is read only once per camera and then cached, so the returned array is read-only. Use
+        ``sequence.vignette('cam1').copy()`` if you need to modify it.
         """
         if cam not in self._cams:
             raise ValueError("Unknown camera name: %s" % cam)
+        if cam in self._vignettes:
+            return self._vignettes[cam]
         file = p.join(self._path, 'params', cam, 'vignette.png')
-        return cv2.imread(file, cv2.IMREAD_GRAYSCALE)
+        Sequence._check_file_exists(file)
+        img = cv2.imread(file, cv2.IMREAD_GRAYSCALE)
+        if img is not None:
+            img.setflags(write=False)
+            self._vignettes[cam] = img
+        return img
 
     @property
     def rolling_shutter_speed(self):
@@ -401,12 +544,11 @@ class Sequence(object):
         How fast did the two rolling shutter cameras shuttered. Returns the time between the exposure of two consecutive 
         rows in milli seconds (approximate)
         
+        :raises: ValueError: if no camera has a rolling shutter with a given speed (e.g. in calibration sequences)
         """
-        for cam in self._cams:
-            shutter = self._cams[cam]['shutter']
-            if shutter['type'] == 'rolling':
-                return shutter['speed']
-        raise ValueError('No cams in %s had rolling shutter enabled!' % self._path)
+        if self._rolling_shutter_speed is None:
+            raise ValueError('No cams in %s had rolling shutter with a known speed enabled!' % self._path)
+        return self._rolling_shutter_speed
 
     @property
     def shutter_types(self):
@@ -432,7 +574,7 @@ class Sequence(object):
             }
             
         """
-        return { cam: self._cams[cam]['shutter']['type'] for cam in self._cams }
+        return { cam: config['shutter']['type'] for cam, config in self._cams.items() }
 
     def lookup_cam_name(self, shutter, side):
         r""" Find the corresponding name of the camera for a given shutter and side
@@ -441,8 +583,8 @@ class Sequence(object):
         :param side: either one of {``'L'``, ``'R'`` }
         :return: one of {``"cam1"`` .. ``"cam4"``} or raises ValueError on invalid parameters
         """
-        for name in self._cams:
-            if self._cams[name]['shutter']['type'] != shutter: continue
+        for name, config in self._cams.items():
+            if config['shutter']['type'] != shutter: continue
             if side == 'L' and name in ['cam1', 'cam4']: return name
             if side == 'R' and name in ['cam2', 'cam3']: return name
 
@@ -450,19 +592,24 @@ class Sequence(object):
 
     def _find_data_for(self, s):
         value = ShutTUM.values.Value(self, s, 'world')  # world as dummy for the time stamp
+        stereo = self._stereo_extrapolate
+        # Positional in the field order of _Data: global_, rolling, imu, groundtruth, stamp
         return Sequence._Data(
-            stamp=s,
-            global_=ShutTUM.values.StereoImage.extrapolate(value, 'global', method='exact'),
-            rolling=ShutTUM.values.StereoImage.extrapolate(value, 'rolling', method='exact'),
-            imu=ShutTUM.values.Imu.extrapolate(value, method='exact'),
-            groundtruth=ShutTUM.values.GroundTruth.extrapolate(value, method='exact')
+            stereo(value, 'global', 'exact'),
+            stereo(value, 'rolling', 'exact'),
+            self._imu_extrapolate(value, 'exact'),
+            self._gt_extrapolate(value, 'exact'),
+            s
         )
 
     def _find_data_between(self, start, stop):
-        for time in self._times:
-            if start is not None and time < start: continue
-            if stop  is not None and time > stop:  continue
-            yield self._find_data_for(time)
+        # times are sorted, so the (inclusive) bounds can be found by bisection
+        self._ensure_data_loaded()
+        t  = self._times
+        lo = 0      if start is None else np.searchsorted(t, start, side='left')
+        hi = len(t) if stop  is None else np.searchsorted(t, stop,  side='right')
+        for time in t[lo:hi]:
+            yield self._find_data_for(float(time))
 
     def __getitem__(self, stamp):
         r"""
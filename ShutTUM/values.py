@@ -5,6 +5,56 @@ import transforms3d as tf
 import ShutTUM
 from collections import namedtuple
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _nearest_index(stamps, stamp):
+    r""" Bisects the sorted array ``stamps`` for the index of the entry closest to ``stamp`` (the smaller on ties)
+    or -1 if ``stamps`` is empty. Gets compiled with numba, if available.
+    """
+    lo, hi = 0, stamps.shape[0]
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if stamps[mid] < stamp: lo = mid + 1
+        else:                   hi = mid
+    if lo == stamps.shape[0]: return lo - 1
+    if lo > 0 and stamp - stamps[lo - 1] <= stamps[lo] - stamp: return lo - 1
+    return lo
+
+
+if njit is not None:
+    _nearest_index = njit(cache=True)(_nearest_index)
+
+
+def _extrapolate_index(sequence, stamps, stamp, method):
+    r""" Finds the row index matching ``stamp`` in the sorted time stamp column ``stamps``
+    :return: the index or None if no row matches 
+    :raises: ValueError: for unknown methods
+    
+    .. seealso:: :any:`StereoImage.extrapolate <ShutTUM.StereoImage.extrapolate>` for the methods
+    """
+    if method == 'closest':
+        i = _nearest_index(stamps, stamp)
+        return i if i >= 0 else None
+
+    if method == 'next':
+        i = np.searchsorted(stamps, stamp, side='right')
+        return i if i < stamps.shape[0] else None
+
+    if method == 'prev':
+        i = np.searchsorted(stamps, stamp, side='left') - 1
+        return i if i >= 0 else None
+
+    if method == 'exact':
+        i = np.searchsorted(stamps, stamp, side='left')
+        return i if i < stamps.shape[0] and stamps[i] == stamp else None
+
+    raise ValueError('[%s] Unknown extrapolation method: %s (supported are "closest", "next", "prev" and "exact")'
+                     % (sequence, method))
+
 
 class Value(object):
     r"""
@@ -150,9 +200,9 @@ class Image(Value):
         if shutter not in ['global', 'rolling']:
             raise ValueError('[%s] Shutter type can only be "global" or "rolling"' % stereo._sequence)
 
-        for cam in stereo._sequence._cams:
+        for cam, config in stereo._sequence._cams.items():
             # Check if the shutter matches
-            if stereo._sequence._cams[cam]['shutter']['type'] != shutter: continue
+            if config['shutter']['type'] != shutter: continue
 
             # Check if the camera position (left/right) matches the camera name
             if left and cam not in ['cam1', 'cam4']: continue
@@ -344,31 +394,11 @@ class StereoImage(Value):
         .. seealso:: :any:`Sequence.cameras <ShutTUM.Sequence.cameras>`
         
         """
-        if method == 'closest':
-            f = value._sequence.raw.frames
-            i = np.abs(f[:, 0] - value.stamp).argmin()
-            return StereoImage(value._sequence, f[i, :], shutter)
-
-        if method == 'next':
-            f = value._sequence.raw.frames
-            frame = f[f[:, 0] > value.stamp, :]
-            if frame.size == 0: return None
-            return StereoImage(value._sequence, frame[0], shutter)
-
-        if method == 'prev':
-            f = value._sequence.raw.frames
-            frame = f[f[:, 0] < value.stamp, :]
-            if frame.size == 0: return None
-            return StereoImage(value._sequence, frame[-1], shutter)
-
-        if method == 'exact':
-            f = value._sequence.raw.frames
-            frame = f[f[:, 0] == value.stamp, :]
-            if frame.size == 0: return None
-            return StereoImage(value._sequence, frame[0], shutter)
-
-        raise ValueError('[%s] Unknown extrapolation method: %s (supported are "closest", "next", "prev" and "exact")'
-                         % (value._sequence, method))
+        sequence = value._sequence
+        sequence._ensure_data_loaded()  # the time stamp columns are only available after loading
+        i = _extrapolate_index(sequence, sequence._frames_t, value.stamp, method)
+        if i is None: return None
+        return StereoImage(sequence, sequence.raw.frames[i], shutter)
 
     def __init__(self, sequence, data, shutter):
         self._data = data
@@ -515,31 +545,11 @@ class Imu(Value):
 
         :return: The matching IMU value or None if no was found
         """
-        if method == 'closest':
-            f = value._sequence.raw.imu
-            i = np.abs(f[:, 0] - value.stamp).argmin()
-            return Imu(value._sequence, f[i, :])
-
-        if method == 'next':
-            f = value._sequence.raw.imu
-            imu = f[f[:, 0] > value.stamp, :]
-            if imu.size == 0: return None
-            return Imu(value._sequence, imu[0])
-
-        if method == 'prev':
-            f = value._sequence.raw.imu
-            imu = f[f[:, 0] < value.stamp, :]
-            if imu.size == 0: return None
-            return Imu(value._sequence, imu[-1])
-
-        if method == 'exact':
-            f = value._sequence.raw.imu
-            imu = f[f[:, 0] == value.stamp, :]
-            if imu.size == 0: return None
-            return Imu(value._sequence, imu[0])
-
-        raise ValueError('[%s] Unknown extrapolation method: %s (supported are "closest", "next", "prev" and "exact")'
-                         % (value._sequence, method))
+        sequence = value._sequence
+        sequence._ensure_data_loaded()  # the time stamp columns are only available after loading
+        i = _extrapolate_index(sequence, sequence._imu_t, value.stamp, method)
+        if i is None: return None
+        return Imu(sequence, sequence.raw.imu[i])
 
     def __init__(self, sequence, data):
         if len(data) < 7: raise ValueError(
@@ -639,8 +649,9 @@ class GroundTruth(Value):
 
         .. seealso:: :any:`Interpolation`
         """
+        sequence._ensure_data_loaded()  # the time stamp columns are only available after loading
         poses = sequence.raw.groundtruth
-        idx = np.searchsorted(poses[:, 0], stamp)
+        idx = np.searchsorted(sequence._ground_truth_t, stamp)
         p = np.ones((1, 3)) * np.nan
         q = np.ones((1, 4)) * np.nan
         if idx != 0 and idx != poses.shape[0]:
@@ -676,31 +687,11 @@ class GroundTruth(Value):
 
         :return: The matching ground truth or None if no was found
         """
-        if method == 'closest':
-            f = value._sequence.raw.groundtruth
-            i = np.abs(f[:, 0] - value.stamp).argmin()
-            return GroundTruth(value._sequence, f[i, :])
-
-        if method == 'next':
-            f = value._sequence.raw.groundtruth
-            gt = f[f[:, 0] > value.stamp, :]
-            if gt.size == 0: return None
-            return GroundTruth(value._sequence, gt[0])
-
-        if method == 'prev':
-            f = value._sequence.raw.groundtruth
-            gt = f[f[:, 0] < value.stamp, :]
-            if gt.size == 0: return None
-            return GroundTruth(value._sequence, gt[-1])
-
-        if method == 'exact':
-            f = value._sequence.raw.groundtruth
-            gt = f[f[:, 0] == value.stamp, :]
-            if gt.size == 0: return None
-            return GroundTruth(value._sequence, gt[0])
-
-        raise ValueError('[%s] Unknown extrapolation method: %s (supported are "closest", "next", "prev" and "exact")'
-                         % (value._sequence, method))
+        sequence = value._sequence
+        sequence._ensure_data_loaded()  # the time stamp columns are only available after loading
+        i = _extrapolate_index(sequence, sequence._ground_truth_t, value.stamp, method)
+        if i is None: return None
+        return GroundTruth(sequence, sequence.raw.groundtruth[i])
 
     def __init__(self, sequence, data):
         if len(data) < 8:
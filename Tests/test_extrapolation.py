@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from ShutTUM.values import _nearest_index
+
+
+class TestNearestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.stamps = np.array((1., 2., 4.))
+        # Check the numba compiled kernel as well as its plain python version
+        self.kernels = [_nearest_index]
+        if hasattr(_nearest_index, 'py_func'): self.kernels.append(_nearest_index.py_func)
+
+    def test_empty_stamps_return_minus_one(self):
+        for nearest in self.kernels:
+            self.assertEqual(nearest(np.array(()), 1.), -1)
+
+    def test_stamp_before_first_returns_first(self):
+        for nearest in self.kernels:
+            self.assertEqual(nearest(self.stamps, -3.), 0)
+
+    def test_stamp_after_last_returns_last(self):
+        for nearest in self.kernels:
+            self.assertEqual(nearest(self.stamps, 17.), 2)
+
+    def test_exact_stamp_returns_its_index(self):
+        for nearest in self.kernels:
+            self.assertEqual(nearest(self.stamps, 1.), 0)
+            self.assertEqual(nearest(self.stamps, 2.), 1)
+            self.assertEqual(nearest(self.stamps, 4.), 2)
+
+    def test_closest_stamp_is_chosen(self):
+        for nearest in self.kernels:
+            self.assertEqual(nearest(self.stamps, 2.4), 1)
+            self.assertEqual(nearest(self.stamps, 3.6), 2)
+
+    def test_tie_returns_smaller_index(self):
+        for nearest in self.kernels:
+            self.assertEqual(nearest(self.stamps, 1.5), 0)
+            self.assertEqual(nearest(self.stamps, 3.), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
+import shutil
+import tempfile
 import yaml
 import numpy     as np
+import os
 import os.path   as p
 from ShutTUM.sequence import Sequence
 from collections import Iterable
@@ -31,6 +34,20 @@ class TestSequence (unittest.TestCase):
         with self.assertRaises(ValueError) as context:
             Sequence(self._wrong_time)
 
+    def test_data_is_loaded_lazily(self):
+        sequence = Sequence(self._valid)
+        self.assertFalse(sequence._data_loaded)
+        sequence.cameras()
+        sequence.resolution
+        sequence.exposure_limits
+        self.assertFalse(sequence._data_loaded)
+        sequence.raw
+        self.assertTrue(sequence._data_loaded)
+
+        sequence = Sequence(self._valid)
+        sequence.times
+        self.assertTrue(sequence._data_loaded)
+
     def test_raw_contains_correct_names(self):
         sequence = Sequence(self._valid)
         self.assertIsInstance(sequence.raw.imu,         np.ndarray)
@@ -57,6 +74,38 @@ class TestSequence (unittest.TestCase):
         self.assertAlmostEqual(white, 255, delta=0.5)
         self.assertAlmostEqual(grey, 59.5, delta=0.5)
 
+    def test_gamma_lookup_of_array_matches_scalar_lookup(self):
+        sequence = Sequence(self._valid)
+        inputs = np.array([[0, 17.3], [128, 255]])
+        values = sequence.gamma('cam1', inputs)
+        self.assertEqual(values.shape, inputs.shape)
+        for x, y in zip(inputs.flat, values.flat):
+            self.assertEqual(y, sequence.gamma('cam1', x))
+
+    def test_gamma_lookup_of_array_fails_for_nan(self):
+        sequence = Sequence(self._valid)
+        with self.assertRaises(ValueError):
+            sequence.gamma('cam1', np.array([0, np.nan, 255]))
+
+    def test_unchecked_gamma_lookup_matches_gamma_lookup(self):
+        sequence = Sequence(self._valid)
+        for x in [0, 17.3, 128, 255]:
+            self.assertEqual(sequence.gamma_unchecked('cam1', x), sequence.gamma('cam1', x))
+
+    def test_missing_gamma_file_fails_only_on_lookup(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            record = p.join(tmp, 'valid')
+            shutil.copytree(self._valid, record)
+            os.remove(p.join(record, 'params', 'cam2', 'gamma.txt'))
+
+            sequence = Sequence(record)
+            self.assertAlmostEqual(sequence.gamma('cam1', 0), 0, delta=0.5)
+            with self.assertRaises(IOError):
+                sequence.gamma('cam2', 0)
+        finally:
+            shutil.rmtree(tmp)
+
     def test_gamma_lookup_fails_for_wrong_cam_name(self):
         sequence = Sequence(self._valid)
         with self.assertRaises(ValueError):
@@ -75,6 +124,10 @@ class TestSequence (unittest.TestCase):
         self.assertTrue(vig is not None)
         self.assertIsInstance(vig, np.ndarray)
 
+    def test_vignette_image_is_cached(self):
+        sequence = Sequence(self._valid)
+        self.assertIs(sequence.vignette('cam1'), sequence.vignette('cam1'))
+
     def test_vignette_raises_on_wrong_camname(self):
         sequence = Sequence(self._valid)
         with self.assertRaises(ValueError):
@@ -84,6 +137,14 @@ class TestSequence (unittest.TestCase):
         sequence = Sequence(self._valid)
         self.assertAlmostEqual(sequence.rolling_shutter_speed, 0.01586, delta=0.001)
 
+    def test_calibration_sequence_loads_without_rolling_shutter_speed(self):
+        sequence = Sequence(self._valid, calibration=True)
+        limits = sequence.exposure_limits
+        self.assertAlmostEqual(limits.min, 0.00898, delta=0.0001)
+        self.assertAlmostEqual(limits.max, 33.3211, delta=0.0001)
+        with self.assertRaises(ValueError):
+            sequence.rolling_shutter_speed
+
     def test_camera_iteration_with_filter(self):
         sequence = Sequence(self._valid)
         cam = sequence.cameras('rolling')
@@ -127,7 +188,12 @@ class TestSequence (unittest.TestCase):
 
     def test_times_are_sorted(self):
         sequence = Sequence(self._valid)
-        self.assertListEqual(sequence.times, sorted(sequence.times))
+        self.assertListEqual(sequence.times_list, sorted(sequence.times))
+
+    def test_times_list_matches_times(self):
+        sequence = Sequence(self._valid)
+        self.assertIsInstance(sequence.times, np.ndarray)
+        self.assertListEqual(sequence.times_list, list(sequence.times))
 
     def test_lookup_returns_image(self):
         sequence = Sequence(self._valid)
@@ -184,6 +250,12 @@ class TestSequence (unittest.TestCase):
         datas = sequence[2:1]
         self.assertEqual(sum(1 for i in datas), 0)
 
+    def test_slicing_includes_both_bounds(self):
+        sequence = Sequence(self._valid)
+        times = sequence.times_list
+        stamps = [data.stamp for data in sequence[times[2]:times[5]]]
+        self.assertListEqual(stamps, times[2:6])
+
     def test_none_end_slicing_will_yield_all_values_till_end(self):
         sequence = Sequence(self._valid)
         datas = sequence[.1:]